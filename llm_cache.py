@@ -0,0 +1,119 @@
+import asyncio
+import functools
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+# =========================
+# Disk-backed LLM response cache (shared across sessions, processes and restarts)
+# =========================
+CACHE_DIR = Path(os.environ.get("LLM_CACHE_DIR", ".llm_cache"))
+CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
+PRUNE_INTERVAL_SECONDS = 60 * 60
+
+_last_prune = 0.0
+
+
+class TruncatedReply(str):
+    # Returned by a wrapped call whose reply was cut off (max_tokens): the caller still gets
+    # the text, but it is never cached.
+    pass
+
+
+def cache_key(
+    model: str,
+    messages: list[dict],
+    temperature: float,
+    system: str | None = None,
+    response_format: dict | None = None,
+    seed: int | None = None,
+) -> str | None:
+    # Sampled (temperature > 0) replies are only reproducible enough to cache when seeded;
+    # otherwise there is no key and the call is never cached.
+    if temperature > 0 and seed is None:
+        return None
+    payload = {"model": model, "messages": messages, "temperature": temperature, "system": system}
+    # Optional fields are only added when set so existing keys stay stable.
+    if response_format is not None:
+        payload["response_format"] = response_format
+    if seed is not None:
+        payload["seed"] = seed
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def get(key: str):
+    path = CACHE_DIR / f"{key}.json"
+    try:
+        if time.time() - path.stat().st_mtime > CACHE_TTL_SECONDS:
+            return None
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def put(key: str, value) -> None:
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    path = CACHE_DIR / f"{key}.json"
+    # Write-then-rename so a concurrent reader never sees a partial file.
+    tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_text(json.dumps(value), encoding="utf-8")
+    os.replace(tmp, path)
+
+    global _last_prune
+    if time.monotonic() - _last_prune > PRUNE_INTERVAL_SECONDS:
+        _last_prune = time.monotonic()
+        prune()
+
+
+def prune() -> None:
+    # get() ignores expired entries; delete them too so the directory doesn't grow without
+    # bound or keep resume-derived text (feedback quotes bullets) past the TTL. Also sweeps
+    # temp files orphaned by a crash mid-write.
+    cutoff = time.time() - CACHE_TTL_SECONDS
+    for path in [*CACHE_DIR.glob("*.json"), *CACHE_DIR.glob("*.tmp")]:
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+        except OSError:
+            pass
+
+
+# Wraps an async fn(model, messages, temperature, *, system=None, response_format=None,
+# seed=None, **kwargs). Only model/messages/temperature/system/response_format/seed form the
+# key; other kwargs (e.g. a streaming sink) don't. Results must be JSON-serialisable.
+# Exceptions, empty replies and TruncatedReply results are never cached, so a refusal or a
+# cut-off reply isn't served again for the whole TTL.
+# Disk reads/writes go through to_thread: the wrapped calls run on the app's shared event
+# loop, and a slow disk there would stall every session's in-flight requests.
+def cached_llm_call(fn):
+    @functools.wraps(fn)
+    async def wrapper(
+        model: str,
+        messages: list[dict],
+        temperature: float,
+        *,
+        system: str | None = None,
+        response_format: dict | None = None,
+        seed: int | None = None,
+        **kwargs,
+    ):
+        if response_format is not None:
+            kwargs["response_format"] = response_format
+        if seed is not None:
+            kwargs["seed"] = seed
+        key = cache_key(model, messages, temperature, system, response_format, seed)
+        if key is None:
+            return await fn(model, messages, temperature, system=system, **kwargs)
+
+        hit = await asyncio.to_thread(get, key)
+        if hit:
+            return hit
+        result = await fn(model, messages, temperature, system=system, **kwargs)
+        if result and not isinstance(result, TruncatedReply):
+            await asyncio.to_thread(put, key, result)
+        return result
+
+    return wrapper
@@ -0,0 +1,67 @@
+import asyncio
+import time
+
+# =========================
+# Token-bucket throttling for API calls (RPM / TPM)
+# =========================
+
+
+class TokenBucket:
+    # Holds up to `rate` units and refills `rate` per `period` seconds. acquire() waits
+    # (in FIFO order, via the lock) instead of letting a burst trip a 429 + backoff.
+    # Must only be used from one event loop: the app's shared loop.
+    def __init__(self, rate: float, period: float = 60.0):
+        self.capacity = float(rate)
+        self.fill_rate = rate / period
+        self.level = float(rate)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, amount: float = 1.0) -> None:
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.level = min(self.capacity, self.level + (now - self.updated) * self.fill_rate)
+                self.updated = now
+                if self.level >= amount:
+                    self.level -= amount
+                    return
+                await asyncio.sleep((amount - self.level) / self.fill_rate)
+
+    def backoff(self, seconds: float) -> None:
+        # A 429 means the provider's window is fuller than our estimate (other processes,
+        # other keys): put the bucket `seconds` into debt so queued and new callers sit out
+        # the Retry-After instead of walking into another 429.
+        self.level = min(self.level, 0.0) - seconds * self.fill_rate
+        self.updated = time.monotonic()
+
+
+def estimate_tokens(messages: list[dict], system: str | None, max_tokens: int) -> int:
+    # ~4 characters per token; providers count max_tokens against TPM up front.
+    chars = sum(len(m["content"]) for m in messages) + len(system or "")
+    return chars // 4 + max_tokens
+
+
+async def throttle(limits: tuple[TokenBucket, TokenBucket], tokens: int) -> None:
+    rpm, tpm = limits
+    await rpm.acquire(1)
+    await tpm.acquire(tokens)
+
+
+def retry_after_seconds(exc: Exception, default: float = 1.0) -> float:
+    # Both SDKs' RateLimitError carry the httpx response; Retry-After may also be an HTTP
+    # date, which we don't bother parsing.
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        return float(headers.get("retry-after", default))
+    except ValueError:
+        return default
+
+
+def backoff(limits: tuple[TokenBucket, TokenBucket], exc: Exception) -> None:
+    # Only the request bucket is pushed back: it gates every call, so the whole queue waits.
+    rpm, _ = limits
+    rpm.backoff(retry_after_seconds(exc))
@@ -1,11 +1,25 @@
+import asyncio
+import gc
+import hashlib
+import importlib
 import io
+import json
+import re
+import threading
+import zipfile
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING
 import streamlit as st
-from docx import Document
-from docx.shared import Pt, Inches
-from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
 
-from openai import OpenAI
-import anthropic
+from llm_cache import TruncatedReply, cached_llm_call
+from rate_limit import TokenBucket, backoff, estimate_tokens, throttle
+
+# openai / anthropic / docx are imported where they are used: they are heavy
+# (httpx, pydantic, lxml) and not needed before a resume is uploaded.
+if TYPE_CHECKING:
+    from docx.document import Document
 
 
 # =========================
@@ -19,6 +33,12 @@ st.set_page_config(page_title="Agentic Resume Assistant", layout="centered")
 # =========================
 OPENAI_KEY = st.secrets.get("OPENAI_API_KEY", "")
 ANTHROPIC_KEY = st.secrets.get("ANTHROPIC_API_KEY", "")
+OPENAI_MODEL = st.secrets.get("OPENAI_MODEL", "gpt-4o-mini")
+# Bullets are a short, well-structured task: the small model is the fast default.
+OPENAI_MODEL_OPTIONS = {"gpt-4o-mini": "Fast (gpt-4o-mini)", "gpt-4o": "High quality (gpt-4o)"}
+# Feedback is the hard stage, but it doesn't need the slowest tier: default to the newest
+# model of this family rather than whatever the API lists first (often Opus).
+CLAUDE_DEFAULT_FAMILY = "sonnet"
 
 if not OPENAI_KEY:
     st.error("Missing OPENAI_API_KEY in Streamlit secrets.")
@@ -28,14 +48,81 @@ if not ANTHROPIC_KEY:
     st.error("Missing ANTHROPIC_API_KEY in Streamlit secrets.")
     st.stop()
 
-client_openai = OpenAI(api_key=OPENAI_KEY)
-client_claude = anthropic.Anthropic(api_key=ANTHROPIC_KEY)
+
+# Clicks are often a minute apart; httpx's default 5s keepalive would drop the pooled
+# connections in between and pay a fresh TCP + TLS handshake on every click.
+HTTP_POOL_LIMITS = {"max_connections": 100, "max_keepalive_connections": 20, "keepalive_expiry": 60.0}
+
+
+def pooled_http_client(default_client_cls):
+    # The SDKs build on httpx (older releases) or its fork httpx2 (newer ones), and only the
+    # one they depend on is guaranteed to be installed: take Limits from the package their
+    # default client subclasses instead of importing either directly.
+    base = next(c for c in default_client_cls.__mro__ if c.__name__ == "AsyncClient")
+    http = importlib.import_module(base.__module__.partition(".")[0])
+    return default_client_cls(limits=http.Limits(**HTTP_POOL_LIMITS))
+
+
+@st.cache_resource
+def get_openai_client():
+    from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+    return AsyncOpenAI(api_key=OPENAI_KEY, http_client=pooled_http_client(DefaultAsyncHttpxClient))
+
+
+@st.cache_resource
+def get_claude_client():
+    import anthropic
+    return anthropic.AsyncAnthropic(
+        api_key=ANTHROPIC_KEY, http_client=pooled_http_client(anthropic.DefaultAsyncHttpxClient)
+    )
+
+
+# Process-wide request budgets, kept under the account limits so bursts wait instead of 429ing.
+@st.cache_resource
+def openai_limits() -> tuple[TokenBucket, TokenBucket]:
+    return TokenBucket(st.secrets.get("OAI_RPM", 500)), TokenBucket(st.secrets.get("OAI_TPM", 200_000))
+
+
+@st.cache_resource
+def anthropic_limits() -> tuple[TokenBucket, TokenBucket]:
+    return TokenBucket(st.secrets.get("ANTHROPIC_RPM", 50)), TokenBucket(st.secrets.get("ANTHROPIC_TPM", 30_000))
+
+
+# =========================
+# Event loop (shared by all sessions)
+# =========================
+@st.cache_resource
+def event_loop() -> asyncio.AbstractEventLoop:
+    # The cached async clients pool connections on the loop that opened them,
+    # so every request runs on this one long-lived loop instead of asyncio.run().
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="llm-event-loop", daemon=True).start()
+    return loop
+
+
+def run_async(coro, on_wait=None):
+    # Blocks until `coro` finishes on the shared loop. `on_wait` runs on the calling
+    # thread between polls, so Streamlit elements are never touched from the loop thread.
+    future = asyncio.run_coroutine_threadsafe(coro, event_loop())
+    while on_wait is not None and not future.done():
+        on_wait()
+        wait([future], timeout=0.1)
+    return future.result()
 
 
 # =========================
 # Session State (persist results across reruns)
 # =========================
-for k in ["resume_text", "feedback", "updated_doc_bytes"]:
+for k in [
+    "resume_text",
+    "feedback",
+    "updated_doc_bytes",
+    "models_future",
+    "available_models",
+    "raw_docx",
+    "raw_docx_id",
+    "last_result",
+]:
     st.session_state.setdefault(k, None)
 
 def reset_outputs():
@@ -47,27 +134,132 @@ def reset_outputs():
 # =========================
 # Utility: Bullet cleanup
 # =========================
-def clean_bullets(text: str) -> list[str]:
-    if not text:
-        return []
+_BULLET_RE = re.compile(r"^[•\-]*\s*(?:\d+[.)]\s+)?")
+
 
-    lines = [ln.strip() for ln in text.splitlines() if ln.strip()]
+def clean_bullets(items: list[str]) -> list[str]:
+    # The schema asks for bare strings, but drop a stray "• " / "1." the model may still prepend.
     bullets: list[str] = []
 
-    for ln in lines:
-        ln2 = ln.lstrip("•").lstrip("-").strip()
-        if len(ln2) >= 3 and ln2[0].isdigit() and ln2[1:3] in [". ", ") "]:
-            ln2 = ln2[3:].strip()
-        if ln2:
-            bullets.append(ln2)
+    for item in items:
+        b = _BULLET_RE.sub("", str(item).strip(), count=1).strip()
+        if b:
+            bullets.append(b)
 
     return bullets[:3]
 
 
+# One closed string item of a JSON array, with its leading separator.
+_JSON_ITEM_RE = re.compile(r'\s*,?\s*"((?:[^"\\]|\\.)*)"')
+
+
+def _json_str(literal: str) -> str:
+    try:
+        return json.loads(f'"{literal}"')
+    except ValueError:
+        return literal
+
+
+def _streamed_array(partial: str, key: str) -> list[str]:
+    # Closed string items of `"key": [...]` in a partial JSON stream; an unfinished item
+    # (or the closing bracket) ends the scan and is picked up on a later poll.
+    m = re.search(rf'"{key}"\s*:\s*\[', partial)
+    if not m:
+        return []
+    items, pos = [], m.end()
+    while item := _JSON_ITEM_RE.match(partial, pos):
+        items.append(_json_str(item.group(1)))
+        pos = item.end()
+    return items
+
+
+def streamed_bullets(partial: str) -> list[str]:
+    # Bullets finished so far in a partial {"bullets": [...]} stream.
+    return clean_bullets(_streamed_array(partial, "bullets"))
+
+
 # =========================
 # OpenAI: Bullet generation
 # =========================
-def generate_bullet_points(subject: str, description: str, github_url: str) -> list[str]:
+# Structured output: the API returns {"bullets": [...]} matching this schema, so there is no
+# line splitting to get wrong. (Strict mode doesn't take minItems/maxItems; the prompt and
+# clean_bullets cover the 2-3 count.)
+BULLETS_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "bullets",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {"bullets": {"type": "array", "items": {"type": "string"}}},
+            "required": ["bullets"],
+            "additionalProperties": False,
+        },
+    },
+}
+# Bullets keep some sampling variety (temperature 0.4); a fixed seed makes a repeat of the same
+# inputs reproducible enough for the disk cache, which skips unseeded sampled calls.
+BULLETS_SEED = 0
+
+
+@cached_llm_call
+async def complete_openai(
+    model: str,
+    messages: list[dict],
+    temperature: float,
+    *,
+    system: str | None = None,
+    response_format: dict | None = None,
+    seed: int | None = None,
+    chunks: list[str] | None = None,
+) -> str:
+    # Streams text deltas into `chunks` (if given) for the UI to render as they arrive.
+    # A reply cut off at max_tokens comes back as TruncatedReply so it isn't cached.
+    import openai
+
+    chunks = [] if chunks is None else chunks
+    if system:
+        messages = [{"role": "system", "content": system}, *messages]
+    max_tokens = 200
+    await throttle(openai_limits(), estimate_tokens(messages, None, max_tokens))
+    extra = {}
+    if response_format:
+        extra["response_format"] = response_format
+    if seed is not None:
+        extra["seed"] = seed
+    try:
+        stream = await get_openai_client().chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            timeout=20,
+            stream=True,
+            **extra,
+        )
+    except openai.RateLimitError as e:
+        # The SDK already retried (honouring Retry-After); slow everyone else down too.
+        backoff(openai_limits(), e)
+        raise
+    finish_reason = None
+    async for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            chunks.append(chunk.choices[0].delta.content)
+        if chunk.choices and chunk.choices[0].finish_reason:
+            finish_reason = chunk.choices[0].finish_reason
+    text = "".join(chunks).strip()
+    return TruncatedReply(text) if finish_reason == "length" else text
+
+
+class BulletGenerationError(ValueError):
+    pass
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+async def generate_bullet_points(
+    subject: str, description: str, github_url: str, model_name: str, _chunks: list[str] | None = None
+) -> list[str]:
+    # `_chunks` receives streamed text for the live preview; the underscore keeps it out of the cache key.
     prompt = f"""You are a resume expert. Based on the project below, generate 2–3 strong, concise resume bullet points.
 Use action verbs, include concrete scope/tech/metrics when possible, and keep each bullet to one line.
 
@@ -75,23 +267,26 @@ Project Title: {subject}
 Project Description: {description}
 GitHub (optional): {github_url}
 
-Return ONLY the bullet points, one per line, each starting with "• ".
+Return the bullets as plain sentences, without bullet glyphs or numbering.
 """
 
-    model_name = st.secrets.get("OPENAI_MODEL", "gpt-4o-mini")
-    resp = client_openai.chat.completions.create(
-        model=model_name,
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.4,
+    raw = await complete_openai(
+        model_name,
+        [{"role": "user", "content": prompt}],
+        0.4,
+        response_format=BULLETS_RESPONSE_FORMAT,
+        seed=BULLETS_SEED,
+        chunks=_chunks,
     )
-    raw = (resp.choices[0].message.content or "").strip()
-    bullets = clean_bullets(raw)
+    try:
+        bullets = clean_bullets(json.loads(raw)["bullets"])
+    except (ValueError, KeyError, TypeError):
+        bullets = []
 
-    if len(bullets) < 2:
-        bullets = [
-            "Built an end-to-end project deliverable from requirements through validation, emphasizing clarity and measurable impact.",
-            "Implemented reliable data processing and analysis workflow with clean documentation and reproducibility.",
-        ][:3]
+    # Raise rather than fall back to generic bullets: a refusal or cut-off reply must not end
+    # up in the user's resume, and exceptions aren't memoized by st.cache_data or session_memo.
+    if not bullets:
+        raise BulletGenerationError("The model returned no usable bullet points.")
 
     return bullets
 
@@ -99,119 +294,439 @@ Return ONLY the bullet points, one per line, each starting with "• ".
 # =========================
 # DOCX: Replace first project under PROJECT EXPERIENCE
 # =========================
-def replace_first_project_safely(doc: Document, new_title: str, new_bullets: list[str]) -> Document:
+_PROJECT_HEADER_RE = re.compile(r"PROJECT EXPERIENCE", re.IGNORECASE)
+
+# Layout lengths in EMU, python-docx's Length unit (Pt()/Inches() return these ints; same
+# arithmetic). Computed once here, and plain ints so docx still isn't imported at load time.
+_EMU_PER_PT = 12700
+_EMU_PER_INCH = 914400
+_TITLE_SIZE = int(12 * _EMU_PER_PT)
+_BULLET_SIZE = int(10.5 * _EMU_PER_PT)
+_BULLET_INDENT = int(0.25 * _EMU_PER_INCH)
+_BULLET_HANG = int(-0.15 * _EMU_PER_INCH)
+_EMU_PER_TWIP = 635
+_RUN_SPLIT_RE = re.compile(r"([\t\n\r])")
+
+
+def _mkpara(text: str, size: int, *, bold: bool = False, indent: int = 0, first_line: int = 0):
+    # One left-aligned, zero-spacing w:p with a single run, built in a single parse. Same XML
+    # python-docx writes for run.font.size/bold + paragraph_format, without the per-property
+    # Python-side element lookups. Lengths are EMU (see above).
+    from docx.oxml import parse_xml
+    from docx.oxml.ns import nsdecls
+
+    ind = ""
+    if indent or first_line:
+        ind = f'<w:ind w:left="{round(indent / _EMU_PER_TWIP)}"'
+        if first_line < 0:
+            ind += f' w:hanging="{round(-first_line / _EMU_PER_TWIP)}"'
+        elif first_line > 0:
+            ind += f' w:firstLine="{round(first_line / _EMU_PER_TWIP)}"'
+        ind += "/>"
+    # Like paragraph.add_run(): tabs become w:tab and line breaks w:br.
+    run = ""
+    for part in _RUN_SPLIT_RE.split(text):
+        if part == "\t":
+            run += "<w:tab/>"
+        elif part in ("\n", "\r"):
+            run += "<w:br/>"
+        elif part:
+            space = ' xml:space="preserve"' if part != part.strip() else ""
+            run += f"<w:t{space}>{escape(part)}</w:t>"
+    return parse_xml(
+        f"<w:p {nsdecls('w')}>"
+        f'<w:pPr><w:spacing w:after="0" w:before="0"/>{ind}<w:jc w:val="left"/></w:pPr>'
+        f"<w:r><w:rPr>{'<w:b/>' if bold else ''}<w:sz w:val=\"{int(size / _EMU_PER_PT * 2)}\"/></w:rPr>"
+        f"{run}</w:r>"
+        "</w:p>"
+    )
+
+
+def _project_heads(texts: list[str], is_bold) -> tuple[int, list[int]]:
+    # One pass over the paragraph texts: returns the PROJECT EXPERIENCE header index and the
+    # index where each project starts (first non-blank line after the header, then every
+    # paragraph whose first run is bold). Project N spans heads[N]..heads[N + 1].
+    header_idx = next((i for i, t in enumerate(texts) if _PROJECT_HEADER_RE.search(t)), -1)
+    if header_idx == -1:
+        return -1, []
+    first = next((i for i in range(header_idx + 1, len(texts)) if texts[i].strip()), None)
+    if first is None:
+        return header_idx, []
+    heads = [first]
+    heads.extend(i for i in range(first + 1, len(texts)) if is_bold(i))
+    return header_idx, heads
+
+
+def replace_first_project_safely(doc: "Document", new_title: str, new_bullets: list[str]) -> "Document":
+    from docx.oxml.ns import qn
+
     def delete_paragraph(paragraph):
         p = paragraph._element
         p.getparent().remove(p)
         paragraph._p = paragraph._element = None
 
-    def format_title(paragraph, text):
-        run = paragraph.add_run(text)
-        run.bold = True
-        run.font.size = Pt(12)
-        paragraph.alignment = WD_PARAGRAPH_ALIGNMENT.LEFT
-        paragraph.paragraph_format.space_after = Pt(0)
-        paragraph.paragraph_format.space_before = Pt(0)
-
-    def format_bullet(paragraph, text):
-        run = paragraph.add_run(f"• {text}")
-        run.font.size = Pt(10.5)
-        paragraph.alignment = WD_PARAGRAPH_ALIGNMENT.LEFT
-        paragraph.paragraph_format.left_indent = Inches(0.25)
-        paragraph.paragraph_format.first_line_indent = Inches(-0.15)
-        paragraph.paragraph_format.space_after = Pt(0)
-        paragraph.paragraph_format.space_before = Pt(0)
+    w_r, w_rpr, w_b, w_val = qn("w:r"), qn("w:rPr"), qn("w:b"), qn("w:val")
 
-    new_bullets = [bp.strip() for bp in new_bullets if bp and bp.strip()]
+    def first_run_bold(p_el):
+        # Same answer as `para.runs and para.runs[0].bold`, without building Run objects.
+        r = p_el.find(w_r)
+        rpr = r.find(w_rpr) if r is not None else None
+        b = rpr.find(w_b) if rpr is not None else None
+        return b is not None and b.get(w_val, "true").lower() not in ("0", "false", "off")
 
-    section_found = False
-    start_idx = -1
-    end_idx = -1
-
-    for i, para in enumerate(doc.paragraphs):
-        if "PROJECT EXPERIENCE" in para.text.upper():
-            section_found = True
-            continue
+    new_bullets = [bp.strip() for bp in new_bullets if bp and bp.strip()]
 
-        if section_found and start_idx == -1 and para.text.strip():
-            start_idx = i
-            continue
+    # Snapshot once: doc.paragraphs rebuilds its list from the XML on every access.
+    paras = list(doc.paragraphs)
+    texts = [p.text for p in paras]
 
-        if section_found and start_idx != -1:
-            if para.runs and para.runs[0].bold:
-                end_idx = i
-                break
+    header_idx, heads = _project_heads(texts, lambda i: first_run_bold(paras[i]._element))
 
-    if not section_found:
+    if header_idx == -1:
         raise ValueError("Could not find 'PROJECT EXPERIENCE' section in the document.")
-    if start_idx == -1:
+    if not heads:
         raise ValueError("Found 'PROJECT EXPERIENCE' but couldn't locate the first project entry below it.")
 
-    if end_idx == -1:
-        for j in range(start_idx + 1, len(doc.paragraphs)):
-            if doc.paragraphs[j].text.strip() == "":
-                end_idx = j
-                break
-        else:
-            end_idx = len(doc.paragraphs)
-
-    for idx in reversed(range(start_idx, end_idx)):
-        delete_paragraph(doc.paragraphs[idx])
-
-    insert_idx = start_idx
-
-    for bullet in reversed(new_bullets):
-        bullet_para = doc.paragraphs[insert_idx].insert_paragraph_before("")
-        format_bullet(bullet_para, bullet)
-
-    title_para = doc.paragraphs[insert_idx].insert_paragraph_before("")
-    format_title(title_para, new_title)
+    start_idx = heads[0]
+    if len(heads) > 1:
+        end_idx = heads[1]
+    else:
+        # Last project: it runs to the first blank line (or the end of the document).
+        end_idx = next((j for j in range(start_idx + 1, len(texts)) if not texts[j].strip()), len(texts))
+
+    old_paras = paras[start_idx:end_idx]
+    anchor = old_paras[0]._element
+
+    # Build the whole new block up front, splice it in directly in front of the old one
+    # (O(1) per element), then drop the old elements.
+    new_ps = [_mkpara(new_title, _TITLE_SIZE, bold=True)]
+    new_ps += [
+        _mkpara(f"• {bullet}", _BULLET_SIZE, indent=_BULLET_INDENT, first_line=_BULLET_HANG)
+        for bullet in new_bullets
+    ]
+    for p in new_ps:
+        anchor.addprevious(p)
+
+    for para in old_paras:
+        delete_paragraph(para)
 
     return doc
 
 
-def extract_text_from_docx(docx_file) -> str:
-    doc = Document(docx_file)
-    return "\n".join([p.text for p in doc.paragraphs if p.text.strip()])
+class _DocxScope:
+    # Holds the one Document a click works on. python-docx/lxml trees hold reference cycles,
+    # so on exit (including when the replace raises) drop it and collect right away rather
+    # than letting trees pile up across clicks in a long-running server.
+    doc: "Document | None" = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.doc = None
+        gc.collect()
+        return False
+
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+# Run children that carry text, as python-docx's CT_R.text maps them. w:br is handled
+# separately: only line breaks are text, page/column breaks give "".
+_RUN_TEXT = {
+    f"{_W}t": None,
+    f"{_W}tab": "\t",
+    f"{_W}ptab": "\t",
+    f"{_W}cr": "\n",
+    f"{_W}noBreakHyphen": "-",
+}
+_W_R, _W_HYPERLINK, _W_BR, _W_TYPE = f"{_W}r", f"{_W}hyperlink", f"{_W}br", f"{_W}type"
+
+
+def _run_text(r) -> str:
+    parts = []
+    for child in r:
+        if child.tag == _W_BR:
+            if child.get(_W_TYPE, "textWrapping") == "textWrapping":
+                parts.append("\n")
+        elif child.tag in _RUN_TEXT:
+            parts.append(_RUN_TEXT[child.tag] or child.text or "")
+    return "".join(parts)
+
+
+def _body_paragraph_texts(body):
+    # Yields Paragraph.text for each body-level w:p, reading the XML directly. Mirrors
+    # python-docx's CT_P.text: only the paragraph's own w:r children and w:hyperlink/w:r
+    # count, so text boxes, tracked changes, smart tags, fields and content controls are
+    # skipped just as Paragraph.text skips them. Works on both lxml (python-docx) and stdlib
+    # ElementTree elements, and skips the per-run Python objects python-docx would build.
+    for p in body.iterfind(f"{_W}p"):
+        parts = []
+        for child in p:
+            if child.tag == _W_R:
+                parts.append(_run_text(child))
+            elif child.tag == _W_HYPERLINK:
+                parts.extend(_run_text(r) for r in child.iterfind(_W_R))
+        yield "".join(parts)
+
+
+def extract_text_from_docx(doc_or_file) -> str:
+    from docx import Document
+    from docx.document import Document as DocxDocument
+
+    # Accept an already-parsed document to skip a second unzip + XML parse.
+    doc = doc_or_file if isinstance(doc_or_file, DocxDocument) else Document(doc_or_file)
+    texts = _body_paragraph_texts(doc.element.body)
+    return "\n".join(t for t in texts if t.strip())
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def extract_text_from_docx_bytes(docx_bytes: bytes) -> str:
+    # Text-only read with the stdlib parser: same output as extract_text_from_docx
+    # without building a python-docx/lxml tree.
+    try:
+        with zipfile.ZipFile(io.BytesIO(docx_bytes)) as zf:
+            body = ElementTree.fromstring(zf.read("word/document.xml")).find(f"{_W}body")
+    except KeyError:
+        # Main part stored under a non-standard name: let python-docx resolve it.
+        return extract_text_from_docx(io.BytesIO(docx_bytes))
+
+    texts = _body_paragraph_texts(body)
+    return "\n".join(t for t in texts if t.strip())
 
 
 # =========================
 # Anthropic: List models + feedback
 # =========================
-@st.cache_data(ttl=300)
-def list_anthropic_models() -> list[str]:
+@st.cache_resource(ttl=24 * 60 * 60, show_spinner=False)
+async def list_anthropic_models() -> tuple[str, ...]:
+    # Shared by every session; errors propagate so a failed lookup is not cached for a day.
+    page = await get_claude_client().models.list(limit=100)
+    return tuple(m.id for m in page.data if getattr(m, "id", None))
+
+
+@st.cache_resource
+def background_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=2)
+
+
+def fetch_anthropic_models() -> tuple[str, ...]:
+    # Runs on the background executor; the request itself goes through the shared loop.
     try:
-        page = client_claude.models.list(limit=100)
-        return [m.id for m in page.data if getattr(m, "id", None)]
+        return run_async(list_anthropic_models())
     except Exception:
+        return ()
+
+
+def prefetch_anthropic_models():
+    st.session_state["models_future"] = background_executor().submit(fetch_anthropic_models)
+
+
+MAX_RESUME_CHARS = 8000  # ~2000 tokens; longer resumes rarely improve the review
+
+
+_SPACE_RUN_RE = re.compile(r"[ \t]+")
+_BLANK_RUN_RE = re.compile(r"\n{3,}")
+
+
+def compact_resume_text(resume_text: str) -> str:
+    # DOCX layouts pad with tabs/space runs (e.g. right-aligned dates); they cost prompt tokens
+    # without telling the reviewer anything.
+    return _BLANK_RUN_RE.sub("\n\n", _SPACE_RUN_RE.sub(" ", resume_text)).strip()
+
+
+def clip_resume_text(resume_text: str) -> tuple[str, bool]:
+    if len(resume_text) <= MAX_RESUME_CHARS:
+        return resume_text, False
+    cut = resume_text.rfind("\n", 0, MAX_RESUME_CHARS)
+    return resume_text[: cut if cut > 0 else MAX_RESUME_CHARS], True
+
+
+FEEDBACK_ROLES = ("data analyst", "product manager", "ML engineer")
+
+
+def role_key(role: str) -> str:
+    return role.lower().replace(" ", "_")
+
+
+def feedback_markdown(
+    suggestions: list[str], weak_bullets: list[str], tailoring: dict, roles: tuple[str, ...], *, final: bool = True
+) -> str:
+    # While streaming (final=False) sections appear once they have an item.
+    lines = []
+    if suggestions or final:
+        lines += ["**Improvement suggestions**", *(f"- {item}" for item in suggestions), ""]
+    if weak_bullets or final:
+        lines += ["**Weak or vague bullet points**", *([f"- {item}" for item in weak_bullets] or ["- None found."]), ""]
+    role_lines = [
+        f"- **{role[0].upper() + role[1:]}:** {tailoring[role_key(role)]}" for role in roles if tailoring.get(role_key(role))
+    ]
+    if role_lines or final:
+        lines += ["**Tailoring by role**", *role_lines]
+    return "\n".join(lines).strip()
+
+
+def _str_list(value) -> list[str] | None:
+    # Missing/null is an empty list; anything but a list of strings is malformed.
+    if value is None:
         return []
+    if isinstance(value, list) and all(isinstance(item, str) for item in value):
+        return value
+    return None
 
 
-def get_resume_feedback_from_claude(resume_text: str, model_id: str) -> str:
+def format_feedback(raw: str, roles: tuple[str, ...]) -> str:
+    # Render the structured review as markdown; fall back to the raw text if it isn't JSON
+    # of the requested shape (the raw reply is disk-cached, so a crash here would repeat).
+    start, end = raw.find("{"), raw.rfind("}")
+    try:
+        data = json.loads(raw[start : end + 1])
+    except ValueError:
+        return raw
+    if not isinstance(data, dict):
+        return raw
+
+    suggestions = _str_list(data.get("suggestions"))
+    weak_bullets = _str_list(data.get("weak_bullets"))
+    tailoring = data.get("role_tailoring") or {}
+    if (
+        suggestions is None
+        or weak_bullets is None
+        or not isinstance(tailoring, dict)
+        or not all(isinstance(v, str) for v in tailoring.values())
+    ):
+        return raw
+    return feedback_markdown(suggestions, weak_bullets, tailoring, roles)
+
+
+def streamed_feedback(partial: str, roles: tuple[str, ...]) -> str:
+    # The items finished so far in a partial feedback stream, rendered like the final review.
+    tailoring = {}
+    m = re.search(r'"role_tailoring"\s*:\s*\{', partial)
+    if m:
+        for role in roles:
+            item = re.compile(rf'"{role_key(role)}"\s*:\s*"((?:[^"\\]|\\.)*)"').search(partial, m.end())
+            if item:
+                tailoring[role_key(role)] = _json_str(item.group(1))
+    return feedback_markdown(
+        _streamed_array(partial, "suggestions"),
+        _streamed_array(partial, "weak_bullets"),
+        tailoring,
+        roles,
+        final=False,
+    )
+
+
+@cached_llm_call
+async def stream_claude(
+    model: str, messages: list[dict], temperature: float, *, system: str | None = None, chunks: list[str]
+) -> str:
+    # Streams text deltas into `chunks` for the UI to render; only a fully received reply is
+    # cached (one cut off at max_tokens comes back as TruncatedReply).
+    import anthropic
+
+    max_tokens = 600  # decode time scales with output length; the prompt asks for ~150 words
+    await throttle(anthropic_limits(), estimate_tokens(messages, system, max_tokens))
+    try:
+        async with get_claude_client().messages.stream(
+            model=model,
+            system=system,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            messages=messages,
+        ) as stream:
+            async for text in stream.text_stream:
+                chunks.append(text)
+            stop_reason = (await stream.get_final_message()).stop_reason
+    except anthropic.RateLimitError as e:
+        backoff(anthropic_limits(), e)
+        raise
+    text = "".join(chunks).strip()
+    return TruncatedReply(text) if stop_reason == "max_tokens" else text
+
+
+async def get_resume_feedback_from_claude(
+    resume_text: str, model_id: str, chunks: list[str], roles: tuple[str, ...] = FEEDBACK_ROLES
+) -> str:
+    # All roles are reviewed in one request, so adding roles doesn't add API calls.
+    resume_text, clipped = clip_resume_text(compact_resume_text(resume_text))
     system_prompt = "You're a career coach reviewing resumes for clarity, impact, and relevance."
+    if clipped:
+        system_prompt += " The resume was truncated for length; review only the text provided."
+    role_keys = ", ".join(f'"{role_key(r)}" ({r})' for r in roles)
     user_prompt = f"""Evaluate the following resume:
 
 {resume_text}
 
-Give me:
-1. 3–5 specific improvement suggestions
-2. Weak or vague bullet points, if any
-3. Suggestions for tailoring to roles like: data analyst, product manager, ML engineer.
-Return your response in a clear bullet list.
+Return ONLY a JSON object with these keys:
+- "suggestions": 3–5 specific improvement suggestions (list of strings)
+- "weak_bullets": weak or vague bullet points quoted from the resume, each with a short fix (list of strings, may be empty)
+- "role_tailoring": an object with one tailoring suggestion (string) per role key: {role_keys}
+
+Be terse: one short sentence per item, 150 words total at most.
 """
 
-    resp = client_claude.messages.create(
-        model=model_id,
-        system=system_prompt,
-        max_tokens=1000,
-        temperature=0.4,
-        messages=[{"role": "user", "content": user_prompt}],
+    # Temperature 0: the same resume should get the same review, and the Messages API has no
+    # seed, so this is what keeps the reply cacheable.
+    raw = await stream_claude(
+        model_id, [{"role": "user", "content": user_prompt}], 0.0, system=system_prompt, chunks=chunks
     )
+    if isinstance(raw, TruncatedReply):
+        # Hit max_tokens mid-JSON: show the items that did finish rather than the raw fragment.
+        note = "_The feedback was cut off before it finished._"
+        partial = streamed_feedback(raw, roles)
+        return TruncatedReply(f"{partial}\n\n{note}" if partial else note)
+    return format_feedback(raw, roles)
+
 
-    return "".join(
-        block.text for block in resp.content
-        if getattr(block, "type", None) == "text"
-    ).strip()
+# =========================
+# Concurrent LLM calls
+# =========================
+def input_key(*parts: str) -> str:
+    # JSON-encode rather than join on a separator, so ("A|B", "C") and ("A", "B|C") differ.
+    return hashlib.blake2b(json.dumps(parts).encode(), digest_size=16).hexdigest()
+
+
+async def session_memo(memo: dict, name: str, key: str, compute):
+    # Reuse this session's last result when the inputs are unchanged (e.g. a repeat click).
+    # `memo` is a plain dict from st.session_state: this runs on the loop thread.
+    # A cut-off result (TruncatedReply) is returned but not kept, so the next click retries.
+    if memo.get(f"{name}_key") == key:
+        return memo[name]
+    value = await compute()
+    if not isinstance(value, TruncatedReply):
+        memo[f"{name}_key"] = key
+        memo[name] = value
+    return value
+
+
+async def run_llm_calls(
+    subject: str,
+    description: str,
+    github_url: str,
+    resume_text: str,
+    openai_model: str,
+    model_id: str,
+    memo: dict,
+    bullet_chunks: list[str],
+    feedback_chunks: list[str],
+) -> tuple[list[str], str]:
+    # Feedback only needs the original resume text, so both API round-trips can overlap.
+    # Kept as two concurrent requests rather than one combined prompt: a single completion
+    # would decode both outputs back to back (slower than max of the two) and lose streaming.
+    bullets, feedback = await asyncio.gather(
+        session_memo(
+            memo,
+            "bullets",
+            input_key(subject, description, github_url, openai_model),
+            lambda: generate_bullet_points(subject, description, github_url, openai_model, bullet_chunks),
+        ),
+        session_memo(
+            memo,
+            "claude_feedback",
+            input_key(resume_text, model_id),
+            lambda: get_resume_feedback_from_claude(resume_text, model_id, feedback_chunks),
+        ),
+    )
+    return bullets, feedback
 
 
 # =========================
@@ -220,14 +735,24 @@ Return your response in a clear bullet list.
 st.title("🤖 Agentic AI Resume Assistant")
 st.markdown("Upload your resume, replace the first project, and get OpenAI + Claude feedback.")
 
+# Warm the model list while the user picks a file and fills in the form.
+if st.session_state["models_future"] is None:
+    prefetch_anthropic_models()
+
 uploaded_file = st.file_uploader("📄 Upload your `.docx` resume", type=["docx"], key="resume_uploader")
 
 # ✅ If user clicks X (clears uploader), reset and stop
 if uploaded_file is None:
     reset_outputs()
+    st.session_state["raw_docx"] = st.session_state["raw_docx_id"] = None
     st.info("Upload a resume to begin.")
     st.stop()
 
+# Read the upload once per file; later reruns reuse the stored bytes.
+if st.session_state["raw_docx_id"] != uploaded_file.file_id:
+    st.session_state["raw_docx"] = uploaded_file.getvalue()
+    st.session_state["raw_docx_id"] = uploaded_file.file_id
+uploaded_bytes = st.session_state["raw_docx"]
 st.success("✅ Resume uploaded successfully!")
 
 st.subheader("🛠️ Replace First Project")
@@ -238,13 +763,32 @@ subject = st.text_input(
 description = st.text_area("Project Description", height=150)
 github_url = st.text_input("GitHub Repository URL (optional)")
 
+st.subheader("✍️ Bullet Model")
+openai_models = list(dict.fromkeys([OPENAI_MODEL, *OPENAI_MODEL_OPTIONS]))
+openai_model = st.selectbox(
+    "Model used to write the project bullets:",
+    options=openai_models,
+    format_func=lambda m: OPENAI_MODEL_OPTIONS.get(m, m),
+)
+
 st.subheader("🧠 Claude Model")
-available_models = list_anthropic_models()
+if st.button("🔄 Refresh models"):
+    list_anthropic_models.clear()
+    prefetch_anthropic_models()
+
+models_future = st.session_state["models_future"]
+if models_future.done():
+    st.session_state["available_models"] = models_future.result()
+elif st.session_state["available_models"] is None:
+    with st.spinner("Loading Claude models..."):
+        st.session_state["available_models"] = models_future.result()
+available_models = st.session_state["available_models"]
 
 if available_models:
-    default_model = st.secrets.get("ANTHROPIC_MODEL", available_models[0])
+    default_model = st.secrets.get("ANTHROPIC_MODEL")
     if default_model not in available_models:
-        default_model = available_models[0]
+        # models.list() returns newest first.
+        default_model = next((m for m in available_models if CLAUDE_DEFAULT_FAMILY in m), available_models[0])
     claude_model = st.selectbox(
         "Pick a Claude model (this list is what your API key can access):",
         options=available_models,
@@ -262,28 +806,88 @@ if st.button("✨ Update Resume & Get Feedback"):
         st.error("Please enter a Project Title.")
         st.stop()
 
-    with st.spinner("Generating bullet points using OpenAI..."):
-        bullet_points = generate_bullet_points(subject, description, github_url)
-
-    with st.spinner("Replacing the first project in your resume..."):
-        doc = Document(uploaded_file)
-        updated_doc = replace_first_project_safely(doc, subject, bullet_points)
-
-        buf = io.BytesIO()
-        updated_doc.save(buf)
-        updated_bytes = buf.getvalue()
-
-        resume_text = extract_text_from_docx(io.BytesIO(updated_bytes))
-
-    with st.spinner(f"Getting feedback from Claude ({claude_model})..."):
-        try:
-            feedback = get_resume_feedback_from_claude(resume_text, claude_model)
-        except anthropic.NotFoundError:
-            st.error(
-                f"Model '{claude_model}' is not available for your API key. "
-                "Pick a different model from the dropdown (if available), or check your Anthropic plan/access."
-            )
-            st.stop()
+    # Same upload, inputs and models as the last run (e.g. a repeat click, or re-uploading
+    # the same file): reuse its outputs without any API calls or DOCX parse.
+    result_key = input_key(
+        hashlib.blake2b(uploaded_bytes, digest_size=16).hexdigest(),
+        subject,
+        description,
+        github_url,
+        openai_model,
+        claude_model,
+    )
+    last_result = st.session_state["last_result"]
+    if last_result is not None and last_result[0] == result_key:
+        _, updated_bytes, resume_text, feedback = last_result
+    else:
+        import anthropic
+        import openai
+        from docx import Document
+
+        # Text-only read for the feedback call; the python-docx tree is built after the
+        # LLM calls so it isn't held in memory while they run.
+        original_text = extract_text_from_docx_bytes(uploaded_bytes)
+        live_bullets = st.empty()
+        live_feedback = st.empty()
+        bullet_chunks: list[str] = []
+        feedback_chunks: list[str] = []
+
+        def render_live_output():
+            if bullets := streamed_bullets("".join(bullet_chunks)):
+                live_bullets.markdown("\n".join(f"- {b}" for b in bullets))
+            if feedback := streamed_feedback("".join(feedback_chunks), FEEDBACK_ROLES):
+                live_feedback.markdown(feedback)
+
+        with st.spinner(f"Generating bullet points and getting feedback from Claude ({claude_model})..."):
+            try:
+                bullet_points, feedback = run_async(
+                    run_llm_calls(
+                        subject,
+                        description,
+                        github_url,
+                        original_text,
+                        openai_model,
+                        claude_model,
+                        st.session_state.setdefault("llm_memo", {}),
+                        bullet_chunks,
+                        feedback_chunks,
+                    ),
+                    on_wait=render_live_output,
+                )
+            except anthropic.NotFoundError:
+                st.error(
+                    f"Model '{claude_model}' is not available for your API key. "
+                    "Pick a different model from the dropdown (if available), or check your Anthropic plan/access."
+                )
+                st.stop()
+            except openai.APITimeoutError:
+                st.error("OpenAI took too long to generate bullet points. Please try again.")
+                st.stop()
+            except BulletGenerationError:
+                st.error(
+                    "Couldn't generate bullet points for this project. "
+                    "Try adding more detail to the description, or pick a different bullet model."
+                )
+                st.stop()
+            except (openai.RateLimitError, anthropic.RateLimitError):
+                st.error("The AI services are busy right now (rate limited). Please try again in a minute.")
+                st.stop()
+
+        # The static render below shows the final resume and feedback.
+        live_bullets.empty()
+        live_feedback.empty()
+
+        with st.spinner("Replacing the first project in your resume..."), _DocxScope() as scope:
+            scope.doc = Document(io.BytesIO(uploaded_bytes))
+            replace_first_project_safely(scope.doc, subject, bullet_points)
+            resume_text = extract_text_from_docx(scope.doc)
+
+            buf = io.BytesIO()
+            scope.doc.save(buf)
+            updated_bytes = buf.getvalue()
+
+        if not isinstance(feedback, TruncatedReply):
+            st.session_state["last_result"] = (result_key, updated_bytes, resume_text, feedback)
 
     # ✅ Persist outputs so they do NOT disappear on download click (rerun)
     st.session_state["updated_doc_bytes"] = updated_bytes
@@ -295,9 +899,10 @@ if st.session_state["resume_text"]:
     st.subheader("✅ Updated Resume Preview")
     st.text_area("Resume Text", st.session_state["resume_text"], height=300)
 
+    # Deferred: the bytes reach Streamlit's media store only when clicked, not on every rerun.
     st.download_button(
         label="📥 Download Updated Resume",
-        data=st.session_state["updated_doc_bytes"],
+        data=lambda docx_bytes=st.session_state["updated_doc_bytes"]: docx_bytes,
         file_name="Updated_Resume.docx",
         mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
     )